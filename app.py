@@ -1,68 +1,111 @@
 import streamlit as st
 import pandas as pd
 import os
-import tempfile
-import json
+import io
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+import fastjsonschema
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # headless raster backend; figures only ever become PNG bytes
 import matplotlib.pyplot as plt
 import seaborn as sns
 import base64
 from src.preprocessing.movement_processor import MovementProcessor
+from src.preprocessing.normalization import normalize_json_data
+from src.preprocessing.cleaners import find_active_start
 from src.preprocessing.signal_processing import AccelerometerData
-from src.visualization.movement_visualizer import MovementVisualizer
+from src.visualization.movement_visualizer import MovementVisualizer, decimated
 from src.analysis.parkinson_diagnosis import ParkinsonDiagnosisSystem
 
 # Configure matplotlib for Streamlit
 plt.style.use('default')
 sns.set_style("whitegrid")
 
+# Shared stateless instances. Streamlit re-executes this script on every
+# widget interaction, so cache_resource keeps one instance per process
+# instead of rebuilding them each rerun.
+@st.cache_resource
+def get_processor() -> MovementProcessor:
+    return MovementProcessor()
+
+
+@st.cache_resource
+def get_diagnosis_system() -> ParkinsonDiagnosisSystem:
+    return ParkinsonDiagnosisSystem()
+
 # =========================
 # Helper Functions
 # =========================
+@st.cache_data
 def get_base64_image(image_path):
-    """Convert image to base64 string for embedding in HTML"""
+    """Convert image to base64 string for embedding in HTML (cached across reruns)"""
     try:
         with open(image_path, "rb") as img_file:
             return base64.b64encode(img_file.read()).decode()
     except FileNotFoundError:
         return None
 
+# Declarative schemas for the two supported JSON shapes, compiled once at
+# import time (fastjsonschema generates validation code, so per-upload checks
+# are just a function call). Only the first sample of each list is checked,
+# matching the previous ad-hoc validation.
+_SCHEMA_IMU = {
+    "type": "object",
+    "required": ["imuData"],
+    "properties": {
+        "imuData": {
+            "type": "array",
+            "minItems": 1,
+            # draft-07 positional form: only the first sample is checked,
+            # matching the previous ad-hoc validation without an O(N) walk
+            "items": [{
+                "type": "object",
+                "required": ["deviceId", "timestamp", "accelerometer"],
+            }],
+        },
+    },
+}
+
+_SCHEMA_RAW_SIDE = {
+    "type": "array",
+    "minItems": 1,
+    "items": [{
+        "type": "object",
+        "required": ["millis", "x", "y", "z"],
+    }],
+}
+
+_SCHEMA_RAW = {
+    "type": "object",
+    "anyOf": [{"required": ["izquierda"]}, {"required": ["derecha"]}],
+    "properties": {
+        "izquierda": _SCHEMA_RAW_SIDE,
+        "derecha": _SCHEMA_RAW_SIDE,
+    },
+}
+
+_VALIDATE_IMU = fastjsonschema.compile(_SCHEMA_IMU)
+_VALIDATE_RAW = fastjsonschema.compile(_SCHEMA_RAW)
+
+
 def validate_json_format(data):
     """Validate if JSON has the expected format"""
     if not isinstance(data, dict):
         return False, "El archivo JSON debe contener un objeto principal."
-    
-    # Check for expected format 1: imuData
+
     if "imuData" in data:
-        if not isinstance(data["imuData"], list):
-            return False, "El campo 'imuData' debe ser una lista."
-        if len(data["imuData"]) == 0:
-            return False, "El campo 'imuData' está vacío."
-        # Check first item structure
-        sample = data["imuData"][0]
-        required_fields = ["deviceId", "timestamp", "accelerometer"]
-        missing = [f for f in required_fields if f not in sample]
-        if missing:
-            return False, f"Faltan campos requeridos en imuData: {', '.join(missing)}"
-        return True, None
-    
-    # Check for expected format 2: izquierda/derecha
-    if "izquierda" in data or "derecha" in data:
-        for side in ["izquierda", "derecha"]:
-            if side in data:
-                if not isinstance(data[side], list):
-                    return False, f"El campo '{side}' debe ser una lista."
-                if len(data[side]) == 0:
-                    return False, f"El campo '{side}' está vacío."
-                # Check first item structure
-                sample = data[side][0]
-                required_fields = ["millis", "x", "y", "z"]
-                missing = [f for f in required_fields if f not in sample]
-                if missing:
-                    return False, f"Faltan campos requeridos en {side}: {', '.join(missing)}"
-        return True, None
-    
-    return False, "Formato JSON no reconocido."
+        validator, format_name = _VALIDATE_IMU, "imuData"
+    elif "izquierda" in data or "derecha" in data:
+        validator, format_name = _VALIDATE_RAW, "izquierda/derecha"
+    else:
+        return False, "Formato JSON no reconocido."
+
+    try:
+        validator(data)
+    except fastjsonschema.JsonSchemaException as e:
+        return False, f"Estructura inválida en formato {format_name}: {e.message}"
+    return True, None
 
 # =========================
 # Page Configuration
@@ -74,283 +117,259 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-def load_and_process_movement_data(file_path: str, exercise: str, trim_inactive: bool = True):
-    """Load and process movement data using new processing modules"""
-    processor = MovementProcessor()
-    visualizer = MovementVisualizer()
-    
-    # Load data
-    with open(file_path, "r") as f:
-        data = json.load(f)
-
-    # Normalize data
-    normalized = {"LEFT": [], "RIGHT": []}
-    if isinstance(data, dict):
-        if "imuData" in data:
-            for d in data["imuData"]:
-                side = "LEFT" if "LEFT" in d["deviceId"].upper() else "RIGHT"
-                normalized[side].append({
-                    "timestamp": d.get("timestamp"),
-                    "accelerometer": d.get("accelerometer", {}),
-                    "gyroscope": d.get("gyroscope", {})
-                })
-        elif "izquierda" in data or "derecha" in data:
-            # Data already comes in g units and °/s, just convert g to m/s²
-            for side, raw_key in [("LEFT", "izquierda"), ("RIGHT", "derecha")]:
-                if raw_key in data:
-                    for d in data[raw_key]:
-                        normalized[side].append({
-                            "timestamp": d["millis"],
-                            "accelerometer": {
-                                "x": d["x"] * 9.81,  # Already in g, convert to m/s²
-                                "y": d["y"] * 9.81,
-                                "z": d["z"] * 9.81,
-                            },
-                            "gyroscope": {
-                                "x": d["a"],  # Already in °/s
-                                "y": d["b"],
-                                "z": d["g"],
-                            }
-                        })
-
-    # Separate and sort data by side FIRST (critical for correct visualization)
-    left_data = []
-    right_data = []
+@st.cache_data(show_spinner=False)
+def render_active_side_figure(file_bytes: bytes, file_name: str, exercise: str, trim_inactive: bool = True) -> bytes:
+    """Render the active-side analysis figure as PNG bytes, cached per upload.
+
+    Reuses the cached processing results, so reruns that only touch widgets
+    skip both the reprocessing and the matplotlib redraw.
+    """
+    results, viz_data = process_uploaded_bytes(file_bytes, file_name, exercise, trim_inactive=trim_inactive)
+    left_acc_data, right_acc_data, left_peaks, right_peaks = viz_data
+    ejercicio = exercise
+    # Determine which side to plot
+    is_left_active = results['active_side'] == 'LEFT'
+    active_acc_data = left_acc_data if is_left_active else right_acc_data
+    active_peaks = left_peaks if is_left_active else right_peaks
+    active_trim_info = results.get('left_trim_info') if is_left_active else results.get('right_trim_info')
+    side_name = "Izquierdo" if is_left_active else "Derecho"
+
+    # Create 2x2 grid: [Magnitude with peaks, Peak progression] [X/Y/Z traces, Rep intervals]
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+
+    # Convert time to seconds once (f32, single allocation) and share it
+    # between the magnitude, peak and per-axis subplots
+    t0 = active_acc_data.timestamps[0]
+    time_active = (active_acc_data.timestamps - t0).astype(np.float32) * np.float32(1e-3)
+    mag_active = active_acc_data.magnitude
+
+    # Plot 1: Magnitude with detected peaks
+    ax1.plot(*decimated(time_active, mag_active), 'b-', linewidth=1.5, label='Magnitud',
+             rasterized=True)
+    if len(active_peaks) > 0:
+        ax1.plot(time_active[active_peaks], mag_active[active_peaks], 'ro', markersize=8, label=f'Picos ({len(active_peaks)})')
+
+    # Add trimming annotation
+    if active_trim_info and active_trim_info['trimmed'] > 0:
+        trimmed = active_trim_info['trimmed']
+        ax1.text(0.02, 0.98, f'{trimmed} muestras recortadas', 
+                transform=ax1.transAxes, fontsize=9, verticalalignment='top',
+                bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5))
+
+    ax1.set_title(f'Lado {side_name} - Magnitud con picos detectados', fontsize=12, fontweight='bold')
+    ax1.set_xlabel('Tiempo (s)')
+    ax1.set_ylabel('Magnitud (m/s²)')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    # Plot 2: Peak magnitude progression (decay visualization)
+    if len(active_peaks) > 0:
+        peak_mags = mag_active[active_peaks]
+        rep_numbers = np.arange(1, len(peak_mags) + 1)
     
-    if "imuData" in data:
-        for d in data["imuData"]:
-            if "LEFT" in d["deviceId"].upper():
-                left_data.append(d)
-            elif "RIGHT" in d["deviceId"].upper():
-                right_data.append(d)
-    else:
-        # Already separated in normalized structure
-        left_data = normalized["LEFT"]
-        right_data = normalized["RIGHT"]
+        ax2.scatter(rep_numbers, peak_mags, s=100, c=rep_numbers, cmap='coolwarm',
+                   edgecolors='black', linewidths=1.5, zorder=3, rasterized=True)
     
-    # Sort by timestamp (fixes the fan pattern issue)
-    left_data.sort(key=lambda x: x["timestamp"])
-    right_data.sort(key=lambda x: x["timestamp"])
+        # Add trend line (linear regression)
+        if len(peak_mags) >= 2:
+            z = np.polyfit(rep_numbers, peak_mags, 1)
+            p = np.poly1d(z)
+            ax2.plot(rep_numbers, p(rep_numbers), "r--", linewidth=2, alpha=0.8, 
+                    label=f'Tendencia (pendiente={results["active_vertical_amplitude_decay"]:.3f} m/s²/rep)')
     
-    # Store original lengths before trimming
-    original_left_len = len(left_data)
-    original_right_len = len(right_data)
+        # Shade first/second half for ratio visualization
+        mid = len(peak_mags) // 2
+        ax2.axvspan(0.5, mid + 0.5, alpha=0.15, color='green', label='Primera mitad')
+        ax2.axvspan(mid + 0.5, len(peak_mags) + 0.5, alpha=0.15, color='orange', label='Segunda mitad')
     
-    # Apply trimming if enabled
-    from src.preprocessing.cleaners import recortar_inactividad
-    if trim_inactive:
-        left_data = recortar_inactividad(left_data, umbral=0.5, min_len=50)
-        right_data = recortar_inactividad(right_data, umbral=0.5, min_len=50)
+        ax2.set_title('Progresión de amplitud de picos (indicador de bradicinesia)', fontsize=12, fontweight='bold')
+        ax2.set_xlabel('Número de repetición')
+        ax2.set_ylabel('Magnitud del pico (m/s²)')
+        ax2.legend(loc='best')
+        ax2.grid(True, alpha=0.3)
+        ax2.set_xticks(rep_numbers)
+    else:
+        ax2.text(0.5, 0.5, 'No hay picos detectados', 
+                ha='center', va='center', transform=ax2.transAxes, fontsize=14)
+        ax2.set_title('Progresión de amplitud de picos', fontsize=12, fontweight='bold')
+
+    # Plot 3: X/Y/Z acceleration traces
+    ax3.plot(*decimated(time_active, active_acc_data.x), 'r-', label='X', alpha=0.7, linewidth=1.2, rasterized=True)
+    ax3.plot(*decimated(time_active, active_acc_data.y), 'g-', label='Y', alpha=0.7, linewidth=1.2, rasterized=True)
+    ax3.plot(*decimated(time_active, active_acc_data.z), 'b-', label='Z', alpha=0.7, linewidth=1.2, rasterized=True)
+    ax3.set_title('Aceleración por ejes', fontsize=12, fontweight='bold')
+    ax3.set_xlabel('Tiempo (s)')
+    ax3.set_ylabel('Aceleración (m/s²)')
+    ax3.legend()
+    ax3.grid(True, alpha=0.3)
+
+    # Plot 4: Repetition intervals (rhythm analysis)
+    if len(active_peaks) > 1:
+        intervals = np.diff(active_acc_data.timestamps[active_peaks])
+        interval_numbers = np.arange(1, len(intervals) + 1)
     
-    # Calculate trimming stats
-    left_trimmed_count = original_left_len - len(left_data)
-    right_trimmed_count = original_right_len - len(right_data)
+        mean_interval = results['active_rep_time_mean']
+        std_interval = results['active_rep_time_std']
     
-    # Update normalized with sorted and trimmed data
-    normalized["LEFT"] = left_data
-    normalized["RIGHT"] = right_data
+        ax4.scatter(interval_numbers, intervals, s=80, c='steelblue', 
+                   edgecolors='black', linewidths=1.5, zorder=3)
+        ax4.axhline(y=mean_interval, color='green', linestyle='--', linewidth=2, 
+                   label=f'Media: {mean_interval:.0f} ms')
+        ax4.axhline(y=mean_interval + std_interval, color='orange', linestyle=':', 
+                   linewidth=1.5, alpha=0.7, label=f'±1 SD: {std_interval:.0f} ms')
+        ax4.axhline(y=mean_interval - std_interval, color='orange', linestyle=':', 
+                   linewidth=1.5, alpha=0.7)
     
-    # Process both sides (now with pre-sorted and pre-trimmed data, so disable internal trimming)
-    left_metrics = processor.process_movement_data(normalized["LEFT"], trim_inactive=False)
-    right_metrics = processor.process_movement_data(normalized["RIGHT"], trim_inactive=False)
+        # Highlight hesitations using the mask already computed during metric
+        # extraction, so the markers match results['active_hesitations']
+        hesitation_mask = results['active_hesitation_mask']
+        if hesitation_mask is not None and np.any(hesitation_mask):
+            ax4.scatter(interval_numbers[hesitation_mask], intervals[hesitation_mask], 
+                       s=150, c='red', marker='x', linewidths=3, zorder=4, label='Titubeos')
     
+        ax4.set_title('Intervalos entre repeticiones (análisis de ritmo)', fontsize=12, fontweight='bold')
+        ax4.set_xlabel('Intervalo #')
+        ax4.set_ylabel('Tiempo entre picos (ms)')
+        ax4.legend(loc='best')
+        ax4.grid(True, alpha=0.3)
+        ax4.set_xticks(interval_numbers)
+    else:
+        ax4.text(0.5, 0.5, 'Insuficientes picos para calcular intervalos', 
+                ha='center', va='center', transform=ax4.transAxes, fontsize=14)
+        ax4.set_title('Intervalos entre repeticiones', fontsize=12, fontweight='bold')
+
+    plt.suptitle(f"{ejercicio.title()} - Lado {side_name} (Activo)", fontsize=14, fontweight='bold')
+    plt.tight_layout()
+
+    # Display in Streamlit
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=90, bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def process_uploaded_bytes(file_bytes: bytes, file_name: str, exercise: str, trim_inactive: bool = True):
+    """Run the full pipeline for an upload, cached on the raw bytes.
+
+    Streamlit reruns the whole script on every widget interaction; caching on
+    (bytes, exercise, trim) means only the first run after an upload pays for
+    parsing, trimming and peak detection. The bytes are parsed in memory -
+    no temp file is written.
+    """
+    return process_movement_payload(orjson.loads(file_bytes), file_name, exercise,
+                                    trim_inactive=trim_inactive)
+
+
+@st.cache_data(show_spinner=False)
+def diagnose_uploaded_bytes(file_bytes: bytes, file_name: str, exercise: str, trim_inactive: bool = True):
+    """Run the severity diagnosis on cached processing results, itself cached"""
+    results, _ = process_uploaded_bytes(file_bytes, file_name, exercise,
+                                        trim_inactive=trim_inactive)
+    return get_diagnosis_system().diagnose(results)
+
+
+def load_and_process_movement_data(file_path: str, exercise: str, trim_inactive: bool = True):
+    """Load a JSON file from disk and run the processing pipeline on it"""
+    with open(file_path, "rb") as f:
+        data = orjson.loads(f.read())
+    return process_movement_payload(data, os.path.basename(file_path), exercise,
+                                    trim_inactive=trim_inactive)
+
+
+def _process_side(processor: MovementProcessor, side_arrays, trim_inactive: bool):
+    """Trim, extract metrics and detect peaks for a single side.
+
+    Runs in a worker thread; the numba kernels release the GIL so left and
+    right genuinely overlap.
+    """
+    original_len = len(side_arrays)
+    acc_data = side_arrays.accelerometer_data()
+
+    # Apply trimming if enabled; sliced() keeps the magnitude computed for
+    # the scan cached, so the processor and the plots reuse it
+    trimmed_count = 0
+    if trim_inactive and original_len > 0:
+        start = find_active_start(acc_data.magnitude, umbral=0.5, min_len=50)
+        if start > 0:
+            acc_data = acc_data.sliced(start)
+            trimmed_count = start
+    # Already sorted and trimmed, so disable internal trimming. Reuse the
+    # peaks found during metric extraction instead of running a second
+    # detect_peaks pass: the plots then mark exactly the repetitions the
+    # reported metrics are based on.
+    metrics, peaks = processor.process_accelerometer_data(
+        acc_data, trim_inactive=False, return_peaks=True)
+    trim_info = {'original': original_len, 'trimmed': trimmed_count,
+                 'remaining': len(acc_data.timestamps)}
+    return acc_data, metrics, peaks, trim_info
+
+
+def process_movement_payload(data: dict, file_name: str, exercise: str, trim_inactive: bool = True):
+    """Process an already-parsed JSON payload using the processing modules"""
+    processor = get_processor()
+
+    # Normalize both JSON shapes into per-side column arrays (vectorized,
+    # already sorted by timestamp - no per-sample dicts are built)
+    sides = normalize_json_data(data)
+
+    # Left and right are independent; process them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future_left = executor.submit(_process_side, processor, sides["LEFT"], trim_inactive)
+        future_right = executor.submit(_process_side, processor, sides["RIGHT"], trim_inactive)
+        left_acc_data, left_metrics, left_peaks, left_trim_info = future_left.result()
+        right_acc_data, right_metrics, right_peaks, right_trim_info = future_right.result()
+    trim_infos = {"LEFT": left_trim_info, "RIGHT": right_trim_info}
+
     # Determine active side
     active_side = "LEFT" if left_metrics.magnitude_mean > right_metrics.magnitude_mean else "RIGHT"
-    
-    # Get timestamps after sorting and trimming
-    left_timestamps = np.array([d["timestamp"] for d in left_data])
-    right_timestamps = np.array([d["timestamp"] for d in right_data])
-    
-    # Normalize timestamps relative to their start times
-    def normalize_timestamps(data, timestamps):
-        start_time = timestamps[0]
-        normalized_ts = (timestamps - start_time) / 1000.0  # Convert to seconds
-        acc_data = []
-        
-        for d in data:
-            acc = d.get('accelerometer', {})
-            if all(k in acc for k in ('x', 'y', 'z')):
-                acc_data.append(acc)
-                
-        return normalized_ts, acc_data
-    
-    left_ts_norm, left_acc = normalize_timestamps(normalized["LEFT"], left_timestamps)
-    right_ts_norm, right_acc = normalize_timestamps(normalized["RIGHT"], right_timestamps)
-    
-    # Create AccelerometerData objects
-    left_acc_data = processor._extract_accelerometer_data(left_data, left_timestamps)
-    right_acc_data = processor._extract_accelerometer_data(right_data, right_timestamps)
-    
-    # Detect peaks using a dynamic prominence so only big changes are selected
-    left_mags = left_acc_data.magnitude
-    right_mags = right_acc_data.magnitude
-
-    def compute_prominence(mags: np.ndarray) -> float:
-        if mags.size == 0:
-            return 0.2
-        r = mags.max() - mags.min()
-        return max(0.2, 0.25 * r)
-
-    left_prom = compute_prominence(left_mags)
-    right_prom = compute_prominence(right_mags)
-
-    left_peaks = processor.signal_processor.detect_peaks(left_mags,
-                                                       prominence=left_prom,
-                                                       distance=8)
-    right_peaks = processor.signal_processor.detect_peaks(right_mags,
-                                                        prominence=right_prom,
-                                                        distance=8)
-    
+
     # Prepare metrics for output
     active_metrics = left_metrics if active_side == "LEFT" else right_metrics
     passive_metrics = right_metrics if active_side == "LEFT" else left_metrics
     
     return {
-        'file': os.path.basename(file_path),
+        'file': file_name,
         'exercise': exercise,
         'active_side': active_side,
-        'left_trim_info': {'original': original_left_len, 'trimmed': left_trimmed_count, 'remaining': len(normalized["LEFT"])},
-        'right_trim_info': {'original': original_right_len, 'trimmed': right_trimmed_count, 'remaining': len(normalized["RIGHT"])},
-        **{f'active_{k}': v for k, v in vars(active_metrics).items()},
-        **{f'passive_{k}': v for k, v in vars(passive_metrics).items()},
+        'left_trim_info': trim_infos["LEFT"],
+        'right_trim_info': trim_infos["RIGHT"],
+        **{f'active_{k}': v for k, v in active_metrics.as_dict().items()},
+        **{f'passive_{k}': v for k, v in passive_metrics.as_dict().items()},
     }, (left_acc_data, right_acc_data, left_peaks, right_peaks)
 
 # =========================
 # Styling
 # =========================
-st.markdown("""
-    <style>
-        /* Fixed topbar */
-        .fixed-topbar {
-            position: fixed;
-            top: 0;
-            left: 0;
-            right: 0;
-            background: linear-gradient(135deg, #1a4d2e 0%, #0d3321 100%);
-            padding: 1rem 2rem;
-            z-index: 999;
-            box-shadow: 0 2px 8px rgba(0, 0, 0, 0.3);
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-        }
-        .fixed-topbar h1 {
-            color: white;
-            font-size: 1.5rem;
-            font-weight: 700;
-            margin: 0;
-        }
-        .fixed-topbar p {
-            color: white;
-            font-size: 0.9rem;
-            margin: 0;
-            opacity: 0.9;
-        }
-        
-        /* Add padding to main content to account for fixed topbar */
-        .main .block-container {
-            padding-top: 5rem;
-        }
-        
-        /* Main header styling */
-        .main-header {
-            background: linear-gradient(135deg, #1a4d2e 0%, #0d3321 100%);
-            padding: 2rem;
-            border-radius: 10px;
-            margin-bottom: 2rem;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.2);
-        }
-        .main-header h1 {
-            color: white;
-            font-size: 2.5rem;
-            font-weight: 700;
-            margin: 0;
-            text-align: center;
-        }
-        .main-header p {
-            color: white;
-            font-size: 1.1rem;
-            text-align: center;
-            margin-top: 0.5rem;
-        }
-        
-        /* Info cards */
-        .info-card {
-            background: white;
-            padding: 1.5rem;
-            border-radius: 8px;
-            border-left: 4px solid #1a4d2e;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
-            margin-bottom: 1rem;
-        }
-        .info-card h3 {
-            color: #1a4d2e;
-            margin-top: 0;
-        }
-        
-        /* Metric styling */
-        .stMetric {
-            background: white;
-            padding: 1rem;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
-        }
-        .stMetric [data-testid="stMetricLabel"] {
-            color: #1f2937 !important;
-        }
-        .stMetric [data-testid="stMetricValue"] {
-            color: #111827 !important;
-            font-weight: 600;
-        }
-        .stMetric [data-testid="stMetricDelta"] {
-            color: #4b5563 !important;
-        }
-        
-        /* File uploader */
-        .uploadedFile {
-            border: 2px dashed #1a4d2e !important;
-            border-radius: 8px;
-        }
-        
-        /* Logo styling in topbar */
-        .topbar-logo {
-            height: 40px;
-            margin: 0 10px;
-            vertical-align: middle;
-            filter: brightness(0) invert(1);
-        }
-        .topbar-logos {
-            display: flex;
-            align-items: center;
-            gap: 15px;
-        }
-        
-        /* Hide Streamlit branding and deployment UI */
-        #MainMenu {visibility: hidden;}
-        footer {visibility: hidden;}
-        header {visibility: hidden;}
-        .stDeployButton {display: none;}
-        [data-testid="stToolbar"] {display: none;}
-        .stActionButton {display: none;}
-        div[data-testid="stDecoration"] {display: none;}
-        button[kind="header"] {display: none;}
-        
-        /* Hide GitHub avatar and fork button */
-        [data-testid="stHeader"] {display: none;}
-        iframe[title="st.iframe"] {display: none;}
-    </style>
-""", unsafe_allow_html=True)
+@st.cache_data
+def load_css(path="assets/styles.css"):
+    """Read the app stylesheet once; reruns reuse the cached string"""
+    with open(path) as f:
+        return f.read()
+
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
+
+
+def error_card(title: str, body: str):
+    """Render a styled error panel; the .err-card CSS ships with the stylesheet"""
+    st.markdown(f'<div class="err-card"><h3>{title}</h3><p>{body}</p></div>',
+                unsafe_allow_html=True)
+
 
 # Load logos
-logo1_base64 = get_base64_image("assets/logo1.png")
-logo2_base64 = get_base64_image("assets/logo2.png")
+@st.cache_data
+def build_logos_html(*image_paths):
+    """Embed all topbar logos as base64 <img> tags in one cached pass"""
+    tags = []
+    for i, path in enumerate(image_paths, start=1):
+        encoded = get_base64_image(path)
+        if encoded:
+            tags.append(f'<img src="data:image/png;base64,{encoded}" class="topbar-logo" alt="Logo {i}">')
+    return "".join(tags)
 
-# Build logo HTML
-logos_html = ""
-if logo1_base64:
-    logos_html += f'<img src="data:image/png;base64,{logo1_base64}" class="topbar-logo" alt="Logo 1">'
-if logo2_base64:
-    logos_html += f'<img src="data:image/png;base64,{logo2_base64}" class="topbar-logo" alt="Logo 2">'
+
+logos_html = build_logos_html("assets/logo1.png", "assets/logo2.png")
 
 # Fixed topbar
 st.markdown(f"""
@@ -405,83 +424,33 @@ asociados con bradicinesia y otras manifestaciones de Parkinson.
 file = st.file_uploader("Sube archivo JSON con datos de movimiento", type="json")
 
 if file:
-    # Save uploaded file temporarily
-    temp_path = os.path.join(tempfile.gettempdir(), file.name)
-    with open(temp_path, "wb") as f:
-        f.write(file.read())
+    # Read the upload once; caching below is keyed on these bytes
+    file_bytes = file.getvalue()
 
     try:
         # Load and validate JSON
-        with open(temp_path, "r") as f:
-            data = json.load(f)
-        
+        data = orjson.loads(file_bytes)
+
         # Validate format
         is_valid, error_message = validate_json_format(data)
         
         if not is_valid:
-            # Display styled error popup
-            st.markdown(f"""
-                <div style="
-                    background: linear-gradient(135deg, #dc2626 0%, #991b1b 100%);
-                    padding: 1.5rem;
-                    border-radius: 8px;
-                    margin: 1rem 0;
-                    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.3);
-                    border-left: 5px solid #fca5a5;
-                ">
-                    <h3 style="color: white; margin: 0 0 0.5rem 0;">
-                        Formato JSON No Reconocido
-                    </h3>
-                    <p style="color: white; font-size: 1rem; margin: 0;">
-                        {error_message}
-                    </p>
-                </div>
-            """, unsafe_allow_html=True)
+            error_card("Formato JSON No Reconocido", error_message)
             st.stop()
         
-        # Process file with new modules
+        # Process file with new modules (cached across reruns on the file bytes)
         with st.spinner("Procesando datos..."):
-            results, viz_data = load_and_process_movement_data(temp_path, ejercicio, trim_inactive=trim_inactive)
+            results, viz_data = process_uploaded_bytes(file_bytes, file.name, ejercicio, trim_inactive=trim_inactive)
         left_acc_data, right_acc_data, left_peaks, right_peaks = viz_data
     
-    except json.JSONDecodeError as e:
-        st.markdown(f"""
-            <div style="
-                background: linear-gradient(135deg, #dc2626 0%, #991b1b 100%);
-                padding: 1.5rem;
-                border-radius: 8px;
-                margin: 1rem 0;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.3);
-                border-left: 5px solid #fca5a5;
-            ">
-                <h3 style="color: white; margin: 0 0 0.5rem 0;">
-                    Error de JSON
-                </h3>
-                <p style="color: white; font-size: 1rem; margin: 0;">
-                    El archivo no es un JSON válido. Verifica la sintaxis del archivo.
-                </p>
-            </div>
-        """, unsafe_allow_html=True)
+    except orjson.JSONDecodeError:
+        error_card("Error de JSON",
+                   "El archivo no es un JSON válido. Verifica la sintaxis del archivo.")
         st.stop()
-    
-    except Exception as e:
-        st.markdown(f"""
-            <div style="
-                background: linear-gradient(135deg, #dc2626 0%, #991b1b 100%);
-                padding: 1.5rem;
-                border-radius: 8px;
-                margin: 1rem 0;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.3);
-                border-left: 5px solid #fca5a5;
-            ">
-                <h3 style="color: white; margin: 0 0 0.5rem 0;">
-                    Error de Procesamiento
-                </h3>
-                <p style="color: white; font-size: 1rem; margin: 0;">
-                    Ocurrió un error al procesar el archivo. Verifica que el formato sea correcto.
-                </p>
-            </div>
-        """, unsafe_allow_html=True)
+
+    except Exception:
+        error_card("Error de Procesamiento",
+                   "Ocurrió un error al procesar el archivo. Verifica que el formato sea correcto.")
         st.stop()
 
     # Display results
@@ -501,9 +470,9 @@ if file:
     st.markdown("---")
     st.markdown("### Diagnóstico Automatizado")
     
-    # Perform diagnosis
-    diagnosis_system = ParkinsonDiagnosisSystem()
-    diagnosis = diagnosis_system.diagnose(results)
+    # Perform diagnosis (cached alongside the processing results)
+    diagnosis = diagnose_uploaded_bytes(file_bytes, file.name, ejercicio,
+                                        trim_inactive=trim_inactive)
     
     # Display severity score with color coding
     severity_colors = {
@@ -583,117 +552,5 @@ if file:
     # Create visualization - only show active side
     st.markdown("### Visualización de Datos")
     
-    # Determine which side to plot
-    is_left_active = results['active_side'] == 'LEFT'
-    active_acc_data = left_acc_data if is_left_active else right_acc_data
-    active_peaks = left_peaks if is_left_active else right_peaks
-    active_trim_info = results.get('left_trim_info') if is_left_active else results.get('right_trim_info')
-    side_name = "Izquierdo" if is_left_active else "Derecho"
-    
-    # Create 2x2 grid: [Magnitude with peaks, Peak progression] [X/Y/Z traces, Rep intervals]
-    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
-    
-    # Convert time to seconds
-    time_active = (active_acc_data.timestamps - active_acc_data.timestamps[0]) / 1000
-    mag_active = active_acc_data.magnitude
-    
-    # Plot 1: Magnitude with detected peaks
-    ax1.plot(time_active, mag_active, 'b-', linewidth=1.5, label='Magnitud')
-    if len(active_peaks) > 0:
-        ax1.plot(time_active[active_peaks], mag_active[active_peaks], 'ro', markersize=8, label=f'Picos ({len(active_peaks)})')
-    
-    # Add trimming annotation
-    if active_trim_info and active_trim_info['trimmed'] > 0:
-        trimmed = active_trim_info['trimmed']
-        ax1.text(0.02, 0.98, f'{trimmed} muestras recortadas', 
-                transform=ax1.transAxes, fontsize=9, verticalalignment='top',
-                bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5))
-    
-    ax1.set_title(f'Lado {side_name} - Magnitud con picos detectados', fontsize=12, fontweight='bold')
-    ax1.set_xlabel('Tiempo (s)')
-    ax1.set_ylabel('Magnitud (m/s²)')
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-    
-    # Plot 2: Peak magnitude progression (decay visualization)
-    if len(active_peaks) > 0:
-        peak_mags = mag_active[active_peaks]
-        rep_numbers = np.arange(1, len(peak_mags) + 1)
-        
-        ax2.scatter(rep_numbers, peak_mags, s=100, c=rep_numbers, cmap='coolwarm', 
-                   edgecolors='black', linewidths=1.5, zorder=3)
-        
-        # Add trend line (linear regression)
-        if len(peak_mags) >= 2:
-            z = np.polyfit(rep_numbers, peak_mags, 1)
-            p = np.poly1d(z)
-            ax2.plot(rep_numbers, p(rep_numbers), "r--", linewidth=2, alpha=0.8, 
-                    label=f'Tendencia (pendiente={results["active_vertical_amplitude_decay"]:.3f} m/s²/rep)')
-        
-        # Shade first/second half for ratio visualization
-        mid = len(peak_mags) // 2
-        ax2.axvspan(0.5, mid + 0.5, alpha=0.15, color='green', label='Primera mitad')
-        ax2.axvspan(mid + 0.5, len(peak_mags) + 0.5, alpha=0.15, color='orange', label='Segunda mitad')
-        
-        ax2.set_title('Progresión de amplitud de picos (indicador de bradicinesia)', fontsize=12, fontweight='bold')
-        ax2.set_xlabel('Número de repetición')
-        ax2.set_ylabel('Magnitud del pico (m/s²)')
-        ax2.legend(loc='best')
-        ax2.grid(True, alpha=0.3)
-        ax2.set_xticks(rep_numbers)
-    else:
-        ax2.text(0.5, 0.5, 'No hay picos detectados', 
-                ha='center', va='center', transform=ax2.transAxes, fontsize=14)
-        ax2.set_title('Progresión de amplitud de picos', fontsize=12, fontweight='bold')
-    
-    # Plot 3: X/Y/Z acceleration traces
-    ax3.plot(time_active, active_acc_data.x, 'r-', label='X', alpha=0.7, linewidth=1.2)
-    ax3.plot(time_active, active_acc_data.y, 'g-', label='Y', alpha=0.7, linewidth=1.2)
-    ax3.plot(time_active, active_acc_data.z, 'b-', label='Z', alpha=0.7, linewidth=1.2)
-    ax3.set_title('Aceleración por ejes', fontsize=12, fontweight='bold')
-    ax3.set_xlabel('Tiempo (s)')
-    ax3.set_ylabel('Aceleración (m/s²)')
-    ax3.legend()
-    ax3.grid(True, alpha=0.3)
-    
-    # Plot 4: Repetition intervals (rhythm analysis)
-    if len(active_peaks) > 1:
-        intervals = np.diff(active_acc_data.timestamps[active_peaks])
-        interval_numbers = np.arange(1, len(intervals) + 1)
-        
-        mean_interval = results['active_rep_time_mean']
-        std_interval = results['active_rep_time_std']
-        
-        ax4.scatter(interval_numbers, intervals, s=80, c='steelblue', 
-                   edgecolors='black', linewidths=1.5, zorder=3)
-        ax4.axhline(y=mean_interval, color='green', linestyle='--', linewidth=2, 
-                   label=f'Media: {mean_interval:.0f} ms')
-        ax4.axhline(y=mean_interval + std_interval, color='orange', linestyle=':', 
-                   linewidth=1.5, alpha=0.7, label=f'±1 SD: {std_interval:.0f} ms')
-        ax4.axhline(y=mean_interval - std_interval, color='orange', linestyle=':', 
-                   linewidth=1.5, alpha=0.7)
-        
-        # Highlight hesitations (outliers)
-        threshold = mean_interval + 2 * std_interval
-        hesitation_mask = intervals > threshold
-        if np.any(hesitation_mask):
-            ax4.scatter(interval_numbers[hesitation_mask], intervals[hesitation_mask], 
-                       s=150, c='red', marker='x', linewidths=3, zorder=4, label='Titubeos')
-        
-        ax4.set_title('Intervalos entre repeticiones (análisis de ritmo)', fontsize=12, fontweight='bold')
-        ax4.set_xlabel('Intervalo #')
-        ax4.set_ylabel('Tiempo entre picos (ms)')
-        ax4.legend(loc='best')
-        ax4.grid(True, alpha=0.3)
-        ax4.set_xticks(interval_numbers)
-    else:
-        ax4.text(0.5, 0.5, 'Insuficientes picos para calcular intervalos', 
-                ha='center', va='center', transform=ax4.transAxes, fontsize=14)
-        ax4.set_title('Intervalos entre repeticiones', fontsize=12, fontweight='bold')
-    
-    plt.suptitle(f"{ejercicio.title()} - Lado {side_name} (Activo)", fontsize=14, fontweight='bold')
-    plt.tight_layout()
-    
-    # Display in Streamlit
-    st.pyplot(fig)
+    st.image(render_active_side_figure(file_bytes, file.name, ejercicio, trim_inactive=trim_inactive))
     plt.close('all')
\ No newline at end of file
@@ -1,78 +1,73 @@
 import os
 import csv
-import json
-from typing import Dict, List, Any
+import operator
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # workers render to files only; no GUI backend needed
+from dataclasses import fields
+from src.analysis.movement_analysis import MovementMetrics
+from src.preprocessing.cleaners import find_active_start
 from src.preprocessing.movement_processor import MovementProcessor
-from src.preprocessing.signal_processing import AccelerometerData
+from src.preprocessing.normalization import SideArrays, normalize_json_data
 from src.visualization.movement_visualizer import MovementVisualizer
 
-def load_json_data(file_path: str) -> Dict[str, List[Dict[str, Any]]]:
-    """Load and normalize JSON data from file"""
-    with open(file_path, "r") as f:
-        data = json.load(f)
-
-    normalized = {"LEFT": [], "RIGHT": []}
-
-    if isinstance(data, dict):
-        if "imuData" in data:
-            # Old format with imuData wrapper
-            for d in data["imuData"]:
-                side = "LEFT" if "LEFT" in d["deviceId"].upper() else "RIGHT"
-                normalized[side].append({
-                    "timestamp": d.get("timestamp"),
-                    "accelerometer": d.get("accelerometer", {}),
-                    "gyroscope": d.get("gyroscope", {})
-                })
-        elif "izquierda" in data or "derecha" in data:
-            # Data already comes in g units and °/s, just convert g to m/s²
-
-            for side, raw_key in [("LEFT", "izquierda"), ("RIGHT", "derecha")]:
-                if raw_key in data:
-                    for d in data[raw_key]:
-                        normalized[side].append({
-                            "timestamp": d["millis"],
-                            "accelerometer": {
-                                "x": d["x"] * 9.81,  # Already in g, convert to m/s²
-                                "y": d["y"] * 9.81,
-                                "z": d["z"] * 9.81,
-                            },
-                            "gyroscope": {
-                                "x": d["a"],  # Already in °/s
-                                "y": d["b"],
-                                "z": d["g"],
-                            }
-                        })
-    return normalized
+def load_json_data(file_path: str) -> Dict[str, SideArrays]:
+    """Load JSON from file and normalize it into per-side column arrays.
+
+    Both pipelines (batch and webapp) now share the vectorized
+    normalization in src/preprocessing/normalization.py, which handles the
+    imuData and izquierda/derecha formats and the g-to-m/s2 conversion.
+    """
+    with open(file_path, "rb") as f:
+        return normalize_json_data(orjson.loads(f.read()))
+
+# CSV column names, prefixed once at import instead of per file; array-valued
+# fields (the hesitation mask) stay out of the CSV
+_METRIC_FIELDS = tuple(f.name for f in fields(MovementMetrics) if f.type is not np.ndarray)
+_ACTIVO_KEYS = tuple(f'activo_{k}' for k in _METRIC_FIELDS)
+_PASIVO_KEYS = tuple(f'pasivo_{k}' for k in _METRIC_FIELDS)
+
+# One instance per process; both are stateless across files and workers
+# inherit (or rebuild) them on first use instead of once per file
+_PROCESSOR = MovementProcessor()
+_VISUALIZER = MovementVisualizer()
+
+def _process_side(side_arrays: SideArrays) -> tuple:
+    """Trim one side and extract its metrics and peaks in a single pass"""
+    acc_data = side_arrays.accelerometer_data()
+    if len(side_arrays) > 0:
+        start = find_active_start(acc_data.magnitude)
+        if start > 0:
+            # sliced() carries the cached magnitude view forward, so the
+            # processor and the comparison plot reuse it instead of
+            # recomputing per consumer
+            acc_data = acc_data.sliced(start)
+
+    metrics, peaks = _PROCESSOR.process_accelerometer_data(
+        acc_data, trim_inactive=False, return_peaks=True)
+    return acc_data, metrics, peaks
 
 def process_file(file_path: str, exercise_type: str, visualizer: MovementVisualizer) -> dict:
     """Process a single movement file and generate visualizations"""
-    processor = MovementProcessor()
-    data = load_json_data(file_path)
-    
-    # Process both sides (with automatic inactive period trimming enabled by default)
-    left_metrics = processor.process_movement_data(data["LEFT"], trim_inactive=True)
-    right_metrics = processor.process_movement_data(data["RIGHT"], trim_inactive=True)
-    
+    sides = load_json_data(file_path)
+
+    # One pipeline pass per side: the same trimmed arrays and peaks back
+    # both the metrics and the comparison plot
+    left_acc_data, left_metrics, left_peaks = _process_side(sides["LEFT"])
+    right_acc_data, right_metrics, right_peaks = _process_side(sides["RIGHT"])
+
     # Determine active side
     active_side = "LEFT" if left_metrics.magnitude_mean > right_metrics.magnitude_mean else "RIGHT"
     passive_side = "RIGHT" if active_side == "LEFT" else "LEFT"
-    
-    # Generate visualizations
+
+    # Generate visualizations (output directories are created up front in
+    # process_all_files, not once per file)
     base_name = os.path.splitext(os.path.basename(file_path))[0]
     viz_path = os.path.join("graficas", exercise_type, f"{base_name}.png")
-    os.makedirs(os.path.dirname(viz_path), exist_ok=True)
-    
-    # Extract AccelerometerData for visualization
-    left_acc_data = processor._extract_accelerometer_data(data["LEFT"], 
-                                                        np.array([d["timestamp"] for d in data["LEFT"]]))
-    right_acc_data = processor._extract_accelerometer_data(data["RIGHT"], 
-                                                         np.array([d["timestamp"] for d in data["RIGHT"]]))
-    
-    # Get peaks for visualization
-    left_peaks = processor.signal_processor.detect_peaks(left_acc_data.magnitude)
-    right_peaks = processor.signal_processor.detect_peaks(right_acc_data.magnitude)
-    
+
     # Generate comparison plot
     visualizer.plot_movement_comparison(
         left_acc_data, right_acc_data,
@@ -85,36 +80,53 @@ def process_file(file_path: str, exercise_type: str, visualizer: MovementVisuali
     active_metrics = left_metrics if active_side == "LEFT" else right_metrics
     passive_metrics = right_metrics if active_side == "LEFT" else left_metrics
     
-    return {
+    row = {
         'archivo': os.path.basename(file_path),
         'ejercicio': exercise_type,
         'lado_activo': active_side,
-        **{f'activo_{k}': v for k, v in active_metrics.__dict__.items()},
-        **{f'pasivo_{k}': v for k, v in passive_metrics.__dict__.items()}
     }
+    row.update(zip(_ACTIVO_KEYS, (getattr(active_metrics, k) for k in _METRIC_FIELDS)))
+    row.update(zip(_PASIVO_KEYS, (getattr(passive_metrics, k) for k in _METRIC_FIELDS)))
+    return row
+
+def _process_entry(entry: tuple) -> dict:
+    """Pool worker: process one (path, exercise, category) entry"""
+    file_path, exercise, category = entry
+    try:
+        result = process_file(file_path, exercise, _VISUALIZER)
+        result['categoria'] = category
+        return result
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return None
 
 def process_all_files():
     """Process all movement files in the data directory"""
     base_dir = './data'
     categories = ['diagnosticados', 'sanos']
     exercises = ['stomp', 'tapping']
-    results = []
-    visualizer = MovementVisualizer()
-    
+
+    # Collect the work list first, then fan it out across cores - each file
+    # is independent and the pipeline is CPU-bound
+    entries = []
     for category in categories:
         for exercise in exercises:
             exercise_dir = os.path.join(base_dir, category, exercise)
             if os.path.exists(exercise_dir):
                 for file_name in os.listdir(exercise_dir):
                     if file_name.endswith('.json'):
-                        file_path = os.path.join(exercise_dir, file_name)
-                        try:
-                            result = process_file(file_path, exercise, visualizer)
-                            result['categoria'] = category
-                            results.append(result)
-                        except Exception as e:
-                            print(f"Error processing {file_path}: {e}")
-    
+                        entries.append((os.path.join(exercise_dir, file_name),
+                                        exercise, category))
+
+    # Create each output directory once instead of stat-ing it per file
+    for exercise in {entry[1] for entry in entries}:
+        os.makedirs(os.path.join('graficas', exercise), exist_ok=True)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for result in executor.map(_process_entry, entries, chunksize=2):
+            if result is not None:
+                results.append(result)
     return results
 
 def save_results(results: List[dict], output_path: str = 'resultados/resultados.csv'):
@@ -125,11 +137,14 @@ def save_results(results: List[dict], output_path: str = 'resultados/resultados.
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
+    # Resolve the column order once and emit tuples; csv.writer skips the
+    # per-row fieldname lookups DictWriter does
     fields = list(results[0].keys())
-    with open(output_path, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fields)
-        writer.writeheader()
-        writer.writerows(results)
+    getter = operator.itemgetter(*fields)
+    with open(output_path, 'w', newline='', buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        writer.writerows(map(getter, results))
     
     print(f"[SUCCESS] Resultados guardados en: {output_path}")
 
@@ -1,9 +1,41 @@
 import numpy as np
-from scipy.stats import linregress
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List
 
-@dataclass
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the cumsum fallback below is used
+    njit = None
+
+
+def _integrate_displacement(z_centered, dt):
+    """Double trapezoidal integration with velocity-drift removal (JIT)."""
+    n = z_centered.shape[0]
+    velocity = np.empty(n, dtype=np.float64)
+    velocity[0] = 0.0
+    v = 0.0
+    v_sum = 0.0
+    for i in range(1, n):
+        v += 0.5 * (z_centered[i - 1] + z_centered[i]) * dt[i - 1]
+        velocity[i] = v
+        v_sum += v
+    # Accumulated alongside the integration: no extra pass over velocity
+    # just to take its mean
+    v_mean = v_sum / n
+
+    displacement = np.empty(n, dtype=np.float64)
+    displacement[0] = 0.0
+    d = 0.0
+    for i in range(1, n):
+        d += 0.5 * ((velocity[i - 1] - v_mean) + (velocity[i] - v_mean)) * dt[i - 1]
+        displacement[i] = d
+    return displacement
+
+
+if njit is not None:
+    _integrate_displacement = njit(cache=True, fastmath=True, nogil=True)(_integrate_displacement)
+
+@dataclass(slots=True)
 class MovementMetrics:
     n_reps: int
     magnitude_mean: float
@@ -16,6 +48,22 @@ class MovementMetrics:
     vertical_amplitude_decay: float  # Peak magnitude decay rate (m/s² per rep, negative = reduction)
     vertical_amplitude_ratio: float  # Peak magnitude first/second half ratio (> 1.0 = reduction)
     hesitations: int
+    hesitation_mask: np.ndarray = None  # Boolean mask over intervals marking the hesitations counted above
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Flat field dict without the deep copies dataclasses.asdict makes"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+def _slope(values: np.ndarray) -> float:
+    """Least-squares slope of values against their index.
+
+    Two dot products instead of scipy.stats.linregress, which also computes
+    r, p-value and standard errors that nobody reads here.
+    """
+    x = np.arange(len(values), dtype=np.float64)
+    x -= x.mean()
+    return float(np.dot(x, values - np.mean(values)) / np.dot(x, x))
+
 
 class MovementAnalyzer:
     def __init__(self, std_threshold: float = 1.5):
@@ -36,18 +84,20 @@ class MovementAnalyzer:
         """Calculate movement slowdown rate"""
         if len(intervals) < 3:
             return 0.0
-            
-        x = np.arange(len(intervals))
-        slope, _, _, _, _ = linregress(x, intervals)
-        return slope
 
-    def count_hesitations(self, intervals: np.ndarray) -> int:
-        """Count movements that took significantly longer than average"""
+        return _slope(intervals)
+
+    def find_hesitations(self, intervals: np.ndarray) -> np.ndarray:
+        """Boolean mask of movements that took significantly longer than average"""
         if len(intervals) < 3:
-            return 0
-            
+            return np.zeros(len(intervals), dtype=bool)
+
         threshold = intervals.mean() + self.std_threshold * intervals.std()
-        return np.sum(intervals > threshold)
+        return intervals > threshold
+
+    def count_hesitations(self, intervals: np.ndarray) -> int:
+        """Count movements that took significantly longer than average"""
+        return int(np.count_nonzero(self.find_hesitations(intervals)))
 
     def calculate_amplitude_decay(self, peak_values: np.ndarray) -> float:
         """Calculate amplitude decay rate using linear regression on peak magnitudes.
@@ -60,10 +110,8 @@ class MovementAnalyzer:
         """
         if len(peak_values) < 3:
             return 0.0
-        
-        x = np.arange(len(peak_values))
-        slope, _, _, _, _ = linregress(x, peak_values)
-        return slope  # m/s² per repetition
+
+        return _slope(peak_values)  # m/s² per repetition
 
     def calculate_amplitude_ratio(self, peak_values: np.ndarray) -> float:
         """Calculate first-half vs second-half peak magnitude ratio.
@@ -109,37 +157,40 @@ class MovementAnalyzer:
             return 0.0, []
         
         # Remove gravity offset
-        z_accel_centered = z_accel - np.mean(z_accel)
-        
-        # First integration: acceleration -> velocity
-        velocity = np.zeros_like(z_accel)
-        for i in range(1, len(z_accel)):
-            velocity[i] = velocity[i-1] + (z_accel_centered[i-1] + z_accel_centered[i]) / 2 * dt[i-1]
-        
-        # Remove velocity drift
-        velocity_centered = velocity - np.mean(velocity)
-        
-        # Second integration: velocity -> displacement
-        displacement = np.zeros_like(velocity)
-        for i in range(1, len(velocity)):
-            displacement[i] = displacement[i-1] + (velocity_centered[i-1] + velocity_centered[i]) / 2 * dt[i-1]
-        
-        # Calculate amplitude for each repetition
-        rep_amplitudes = []
-        for i in range(len(peaks) - 1):
-            start_idx = peaks[i]
-            end_idx = peaks[i + 1]
-            
-            rep_displacement = displacement[start_idx:end_idx]
-            if len(rep_displacement) > 0:
-                rep_amplitude = np.max(rep_displacement) - np.min(rep_displacement)
-                rep_amplitudes.append(rep_amplitude * 100)  # convert to cm
-        
-        if not rep_amplitudes:
+        z_accel_centered = z_accel.astype(np.float64) - np.mean(z_accel, dtype=np.float64)
+
+        if njit is not None:
+            # Fused kernel keeps the running integrals in registers instead
+            # of materializing the trapezoid-increment temporaries
+            displacement = _integrate_displacement(z_accel_centered, dt)
+        else:
+            # First integration: acceleration -> velocity (trapezoidal rule
+            # as a cumulative sum of per-step increments)
+            velocity = np.empty(len(z_accel), dtype=np.float64)
+            velocity[0] = 0.0
+            np.cumsum(0.5 * (z_accel_centered[:-1] + z_accel_centered[1:]) * dt,
+                      out=velocity[1:])
+
+            # Remove velocity drift
+            velocity_centered = velocity - np.mean(velocity)
+
+            # Second integration: velocity -> displacement
+            displacement = np.empty_like(velocity)
+            displacement[0] = 0.0
+            np.cumsum(0.5 * (velocity_centered[:-1] + velocity_centered[1:]) * dt,
+                      out=displacement[1:])
+        
+        # Per-repetition amplitude: reduceat reduces each [peaks[i], peaks[i+1])
+        # segment in one C pass; the trailing segment past the last peak is
+        # dropped, matching the old pairwise loop
+        seg_max = np.maximum.reduceat(displacement, peaks)[:-1]
+        seg_min = np.minimum.reduceat(displacement, peaks)[:-1]
+        rep_amplitudes = (seg_max - seg_min) * 100  # convert to cm
+
+        if len(rep_amplitudes) == 0:
             return 0.0, []
-        
-        mean_amplitude_cm = np.mean(rep_amplitudes)
-        return mean_amplitude_cm, rep_amplitudes
+
+        return rep_amplitudes.mean(), rep_amplitudes
 
     def analyze_movement(self, 
                         magnitudes: np.ndarray,
@@ -152,6 +203,7 @@ class MovementAnalyzer:
             return MovementMetrics(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0)
 
         peak_magnitudes = magnitudes[peaks]
+        hesitation_mask = self.find_hesitations(intervals)
         mean_amplitude, per_rep_amplitudes = self.calculate_vertical_displacement(z_accel, timestamps, peaks)
         
         # Use peak magnitudes for progression metrics (clearer signal than displacement)
@@ -169,5 +221,6 @@ class MovementAnalyzer:
             vertical_amplitude_mean=mean_amplitude,
             vertical_amplitude_decay=amplitude_decay,
             vertical_amplitude_ratio=amplitude_ratio,
-            hesitations=self.count_hesitations(intervals)
+            hesitations=int(np.count_nonzero(hesitation_mask)),
+            hesitation_mask=hesitation_mask
         )
\ No newline at end of file
@@ -5,8 +5,49 @@ Grades 0-4 based on movement analysis metrics
 """
 
 from dataclasses import dataclass
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Union
 import numpy as np
+import pandas as pd
+
+from src.analysis.movement_analysis import MovementMetrics
+
+
+# Severity levels in scoring order; band k interpolates between thresholds
+# k-1 and k of this ladder
+_LEVELS = ('normal', 'mild', 'moderate', 'marked', 'severe')
+
+# Severity score -> patient-facing label, built once at import
+_SEVERITY_LABELS = {
+    0: "Normal - Sin signos de deterioro motor",
+    1: "Leve - Reducción leve de amplitud o ritmo irregular",
+    2: "Moderado - Clara bradicinesia con reducción progresiva",
+    3: "Marcado - Bradicinesia severa con congelamiento frecuente",
+    4: "Severo - Movimiento extremadamente limitado"
+}
+
+# Clinical-note fragments that never vary per patient, assembled at import
+# instead of re-interpolated on every _generate_clinical_notes call
+_NOTES_SCORE_0 = "\n".join((
+    "Movimiento dentro de parámetros normales",
+    "No se observan signos de bradicinesia",
+    "Ritmo consistente y amplitud estable",
+))
+_NOTES_SCORE_4 = "\n".join((
+    "[SEVERO] Compromiso motor severo",
+    "• Capacidad de movimiento extremadamente limitada",
+    "• Bradykinesia extrema con posible congelamiento",
+    "→ Recomendación: Ajuste inmediato de tratamiento",
+))
+_NOTE_HEADERS = {
+    1: "[LEVE] Signos tempranos de deterioro motor",
+    2: "[MODERADO] Bradicinesia moderada detectada",
+    3: "[MARCADO] Bradicinesia marcada con compromiso funcional",
+}
+_NOTE_RECOMMENDATIONS = {
+    1: "→ Recomendación: Monitoreo periódico",
+    2: "→ Recomendación: Evaluación neurológica completa",
+    3: "→ Recomendación: Intervención terapéutica urgente",
+}
 
 
 @dataclass
@@ -94,6 +135,17 @@ class ParkinsonDiagnosisSystem:
             'severe': 7.0         # Almost constant
         }
         
+        # Monotonic band arrays derived from the threshold dicts above;
+        # searchsorted on these replaces the old if/elif ladders. Features
+        # where higher is better (decay with its sign, magnitude) are negated
+        # so every band array increases with severity.
+        self._decay_bands = -np.array([self.decay_thresholds[k] for k in _LEVELS])
+        self._ratio_bands = np.array([self.ratio_thresholds[k] for k in _LEVELS])
+        self._magnitude_bands = -np.array([self.magnitude_thresholds[k] for k in _LEVELS])
+        self._rhythm_bands = np.array([self.rhythm_std_thresholds[k] for k in _LEVELS], dtype=np.float64)
+        self._rep_time_bands = np.array([self.rep_time_thresholds[k] for k in _LEVELS], dtype=np.float64)
+        self._hesitation_bands = np.array([self.hesitation_thresholds[k] for k in _LEVELS])
+
         # Feature weights for final scoring (sum to 1.0)
         self.feature_weights = {
             'decay_rate': 0.30,      # Most important - captures bradykinesia
@@ -103,172 +155,155 @@ class ParkinsonDiagnosisSystem:
             'rep_time': 0.10,         # Less critical - speed
             'hesitations': 0.05       # Least critical - freezing episodes
         }
+
+        # Weight vector in feature-scoring order; one dot product against
+        # the score array replaces six dict lookups and multiplications
+        self._weights_vec = np.array([self.feature_weights[k] for k in
+                                      ('decay_rate', 'amplitude_ratio', 'magnitude',
+                                       'rhythm_std', 'rep_time', 'hesitations')])
+
+        # Metric keys and their defaults, unpacked in one sweep in diagnose
+        self._defaults = (
+            ('active_vertical_amplitude_decay', 0),
+            ('active_vertical_amplitude_ratio', 1.0),
+            ('active_magnitude_mean', 0),
+            ('active_rep_time_std', 0),
+            ('active_rep_time_mean', 0),
+            ('active_hesitations', 0),
+            ('active_peaks_count', 10),
+        )
     
-    def _score_decay_rate(self, value: float) -> Tuple[float, str]:
+    def _score_banded(self, value: float, bands: np.ndarray) -> Tuple[float, str]:
         """
-        Special scoring for decay rate (handles negative values)
-        
-        Decay rate interpretation:
-        - Positive values (e.g., +0.05) = improvement/warm-up = GOOD (score 0)
-        - Near zero (-0.03 to 0) = stable = GOOD (score 0)
-        - Negative values = progressive reduction = BAD (score increases with magnitude)
-        
+        Score a single feature on the 0-4 scale via its severity band array.
+
+        `bands` holds the five thresholds in increasing-severity order
+        (features where higher is better are pre-negated in __init__, so the
+        caller passes the negated value). searchsorted locates the band and
+        one affine interpolation inside it replaces the old if/elif ladder.
+
         Args:
-            value: Decay rate in m/s²/rep (can be negative, zero, or positive)
-        
+            value: Feature value, oriented so larger = worse
+            bands: Monotonically increasing threshold array from __init__
+
         Returns:
             (score, severity_label)
         """
-        # Positive or near-zero = normal (healthy)
-        if value >= self.decay_thresholds['normal']:  # >= -0.03
-            return 0.0, 'normal'
-        
-        # Progressive worsening as value becomes more negative
-        elif value >= self.decay_thresholds['mild']:  # -0.03 to -0.08
-            range_span = self.decay_thresholds['mild'] - self.decay_thresholds['normal']
-            score = (value - self.decay_thresholds['normal']) / range_span
-            return score, 'mild'
-        
-        elif value >= self.decay_thresholds['moderate']:  # -0.08 to -0.15
-            range_span = self.decay_thresholds['moderate'] - self.decay_thresholds['mild']
-            score = 1.0 + ((value - self.decay_thresholds['mild']) / range_span)
-            return min(score, 2.0), 'moderate'
-        
-        elif value >= self.decay_thresholds['marked']:  # -0.15 to -0.25
-            range_span = self.decay_thresholds['marked'] - self.decay_thresholds['moderate']
-            score = 2.0 + ((value - self.decay_thresholds['moderate']) / range_span)
-            return min(score, 3.0), 'marked'
-        
-        elif value >= self.decay_thresholds['severe']:  # -0.25 to -0.40
-            range_span = self.decay_thresholds['severe'] - self.decay_thresholds['marked']
-            score = 3.0 + ((value - self.decay_thresholds['marked']) / range_span)
-            return min(score, 4.0), 'severe'
-        
-        else:  # < -0.40 = extreme
-            return 4.0, 'severe'
-    
-    def _score_feature(self, value: float, thresholds: dict, inverse: bool = False) -> Tuple[float, str]:
+        band = int(np.searchsorted(bands, value))
+        if band == 0:
+            return 0.0, _LEVELS[0]
+        if band >= len(bands):
+            return 4.0, _LEVELS[-1]
+        lo = bands[band - 1]
+        score = band - 1 + (value - lo) / (bands[band] - lo)
+        return score, _LEVELS[band]
+
+    @staticmethod
+    def _score_banded_array(values: np.ndarray, bands: np.ndarray) -> np.ndarray:
+        """Vectorized _score_banded over a column of feature values"""
+        band = np.searchsorted(bands, values)
+        inner = np.clip(band, 1, len(bands) - 1)
+        lo = bands[inner - 1]
+        scores = inner - 1 + (values - lo) / (bands[inner] - lo)
+        return np.where(band == 0, 0.0,
+                        np.where(band >= len(bands), 4.0, scores))
+
+    def diagnose_batch(self, metrics_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Score a single feature on 0-4 scale
-        
+        Score a whole cohort of patients in one vectorized pass.
+
+        Expects the same 'active_*' columns diagnose() reads from its
+        metrics dict (missing columns fall back to the same defaults).
+        Each feature is scored by a single vectorized searchsorted over
+        its band array instead of one Python call per patient.
+
         Args:
-            value: Feature value to score
-            thresholds: Dictionary with severity level thresholds
-            inverse: If True, higher values = better (e.g., magnitude)
-        
+            metrics_df: DataFrame with one row per patient
+
         Returns:
-            (score, severity_label)
+            (severity_scores, confidences) — int 0-4 and float 0.5-1.0
+            arrays, one entry per row
         """
-        if inverse:
-            # For features where higher is better (magnitude)
-            if value >= thresholds['normal']:
-                return 0.0, 'normal'
-            elif value >= thresholds['mild']:
-                # Interpolate between 0 and 1
-                range_span = thresholds['normal'] - thresholds['mild']
-                score = 1.0 - ((value - thresholds['mild']) / range_span)
-                return score, 'mild'
-            elif value >= thresholds['moderate']:
-                range_span = thresholds['mild'] - thresholds['moderate']
-                score = 1.0 + (1.0 - ((value - thresholds['moderate']) / range_span))
-                return min(score, 2.0), 'moderate'
-            elif value >= thresholds['marked']:
-                range_span = thresholds['moderate'] - thresholds['marked']
-                score = 2.0 + (1.0 - ((value - thresholds['marked']) / range_span))
-                return min(score, 3.0), 'marked'
-            else:
-                # Below marked threshold = severe
-                if value >= thresholds['severe']:
-                    range_span = thresholds['marked'] - thresholds['severe']
-                    score = 3.0 + (1.0 - ((value - thresholds['severe']) / range_span))
-                    return min(score, 4.0), 'severe'
-                else:
-                    return 4.0, 'severe'
-        else:
-            # For features where lower is better (decay, ratio, std, time, hesitations)
-            if value <= thresholds['normal']:
-                return 0.0, 'normal'
-            elif value <= thresholds['mild']:
-                range_span = thresholds['mild'] - thresholds['normal']
-                score = (value - thresholds['normal']) / range_span
-                return score, 'mild'
-            elif value <= thresholds['moderate']:
-                range_span = thresholds['moderate'] - thresholds['mild']
-                score = 1.0 + ((value - thresholds['mild']) / range_span)
-                return min(score, 2.0), 'moderate'
-            elif value <= thresholds['marked']:
-                range_span = thresholds['marked'] - thresholds['moderate']
-                score = 2.0 + ((value - thresholds['moderate']) / range_span)
-                return min(score, 3.0), 'marked'
-            else:
-                # Above marked threshold = severe
-                if value <= thresholds['severe']:
-                    range_span = thresholds['severe'] - thresholds['marked']
-                    score = 3.0 + ((value - thresholds['marked']) / range_span)
-                    return min(score, 4.0), 'severe'
-                else:
-                    return 4.0, 'severe'
-    
-    def diagnose(self, metrics: Dict) -> DiagnosisResult:
+        n = len(metrics_df)
+
+        def column(key: str, default: float) -> np.ndarray:
+            if key in metrics_df:
+                return metrics_df[key].to_numpy(dtype=np.float64)
+            return np.full(n, default)
+
+        decay = column('active_vertical_amplitude_decay', 0)
+        ratio = column('active_vertical_amplitude_ratio', 1.0)
+        magnitude = column('active_magnitude_mean', 0)
+        rhythm_std = column('active_rep_time_std', 0)
+        rep_time = column('active_rep_time_mean', 0)
+        hesitations = column('active_hesitations', 0)
+        num_peaks = column('active_peaks_count', 10)
+        hesitations_normalized = hesitations / np.maximum(num_peaks, 1) * 10
+
+        scores = np.column_stack([
+            self._score_banded_array(-decay, self._decay_bands),
+            self._score_banded_array(ratio, self._ratio_bands),
+            self._score_banded_array(-magnitude, self._magnitude_bands),
+            self._score_banded_array(rhythm_std, self._rhythm_bands),
+            self._score_banded_array(rep_time, self._rep_time_bands),
+            self._score_banded_array(hesitations_normalized, self._hesitation_bands),
+        ])
+        severity_scores = np.clip(np.rint(scores @ self._weights_vec), 0, 4).astype(int)
+        confidences = np.clip(1.0 - scores.var(axis=1) / 4.0, 0.5, 1.0)
+        return severity_scores, confidences
+
+    def diagnose(self, metrics: Union[Dict, MovementMetrics]) -> DiagnosisResult:
         """
         Perform comprehensive diagnosis based on movement metrics
-        
+
         Args:
-            metrics: Dictionary with movement analysis results (from MovementProcessor)
-        
+            metrics: Dictionary with movement analysis results (with the
+                'active_' key prefix) or the active side's MovementMetrics
+                dataclass, read by attribute without building a dict
+
         Returns:
             DiagnosisResult with severity score (0-4) and clinical interpretation
         """
         # Extract key metrics (use active side)
         # Keep decay_rate with original sign: negative = reduction (bad), positive = improvement (good)
-        decay_rate = metrics.get('active_vertical_amplitude_decay', 0)
-        
-        amplitude_ratio = metrics.get('active_vertical_amplitude_ratio', 1.0)
-        magnitude = metrics.get('active_magnitude_mean', 0)
-        rhythm_std = metrics.get('active_rep_time_std', 0)
-        rep_time = metrics.get('active_rep_time_mean', 0)
-        hesitations = metrics.get('active_hesitations', 0)
-        num_peaks = metrics.get('active_peaks_count', 10)
+        if isinstance(metrics, MovementMetrics):
+            decay_rate = metrics.vertical_amplitude_decay
+            amplitude_ratio = metrics.vertical_amplitude_ratio
+            magnitude = metrics.magnitude_mean
+            rhythm_std = metrics.rep_time_std
+            rep_time = metrics.rep_time_mean
+            hesitations = metrics.hesitations
+            num_peaks = metrics.n_reps
+        else:
+            (decay_rate, amplitude_ratio, magnitude, rhythm_std,
+             rep_time, hesitations, num_peaks) = (metrics.get(k, d)
+                                                  for k, d in self._defaults)
         
         # Normalize hesitations per 10 repetitions
         hesitations_normalized = (hesitations / max(num_peaks, 1)) * 10
         
-        # Score each feature (use special method for decay_rate)
-        decay_score, decay_label = self._score_decay_rate(decay_rate)
-        ratio_score, ratio_label = self._score_feature(amplitude_ratio, self.ratio_thresholds, inverse=False)
-        magnitude_score, magnitude_label = self._score_feature(magnitude, self.magnitude_thresholds, inverse=True)
-        rhythm_score, rhythm_label = self._score_feature(rhythm_std, self.rhythm_std_thresholds, inverse=False)
-        time_score, time_label = self._score_feature(rep_time, self.rep_time_thresholds, inverse=False)
-        hesitation_score, hesitation_label = self._score_feature(hesitations_normalized, self.hesitation_thresholds, inverse=False)
-        
-        # Calculate weighted severity score
-        weighted_score = (
-            decay_score * self.feature_weights['decay_rate'] +
-            ratio_score * self.feature_weights['amplitude_ratio'] +
-            magnitude_score * self.feature_weights['magnitude'] +
-            rhythm_score * self.feature_weights['rhythm_std'] +
-            time_score * self.feature_weights['rep_time'] +
-            hesitation_score * self.feature_weights['hesitations']
-        )
-        
+        # Score each feature; decay and magnitude are negated to match their
+        # pre-negated band arrays (higher raw value = better for both)
+        decay_score, decay_label = self._score_banded(-decay_rate, self._decay_bands)
+        ratio_score, ratio_label = self._score_banded(amplitude_ratio, self._ratio_bands)
+        magnitude_score, magnitude_label = self._score_banded(-magnitude, self._magnitude_bands)
+        rhythm_score, rhythm_label = self._score_banded(rhythm_std, self._rhythm_bands)
+        time_score, time_label = self._score_banded(rep_time, self._rep_time_bands)
+        hesitation_score, hesitation_label = self._score_banded(hesitations_normalized, self._hesitation_bands)
+        
+        # Calculate weighted severity score (one dot product)
+        scores = np.array([decay_score, ratio_score, magnitude_score,
+                           rhythm_score, time_score, hesitation_score])
+        weighted_score = float(scores @ self._weights_vec)
+
         # Round to nearest integer (0-4)
         severity_score = int(round(weighted_score))
         severity_score = max(0, min(4, severity_score))  # Clamp to 0-4
-        
-        # Map score to label
-        severity_labels = {
-            0: "Normal - Sin signos de deterioro motor",
-            1: "Leve - Reducción leve de amplitud o ritmo irregular",
-            2: "Moderado - Clara bradicinesia con reducción progresiva",
-            3: "Marcado - Bradicinesia severa con congelamiento frecuente",
-            4: "Severo - Movimiento extremadamente limitado"
-        }
-        
-        severity_label = severity_labels[severity_score]
-        
+
+        severity_label = _SEVERITY_LABELS[severity_score]
+
         # Calculate confidence based on consistency of feature scores
-        score_variance = np.var([decay_score, ratio_score, magnitude_score, 
-                                 rhythm_score, time_score, hesitation_score])
+        score_variance = np.var(scores)
         # Lower variance = higher confidence
         confidence = max(0.5, min(1.0, 1.0 - (score_variance / 4.0)))
         
@@ -296,50 +331,40 @@ class ParkinsonDiagnosisSystem:
             clinical_notes=clinical_notes
         )
     
-    def _generate_clinical_notes(self, score: int, decay: str, ratio: str, 
-                                  magnitude: str, rhythm: str, time: str, 
+    def _generate_clinical_notes(self, score: int, decay: str, ratio: str,
+                                  magnitude: str, rhythm: str, time: str,
                                   hesitation: str) -> str:
         """Generate detailed clinical interpretation"""
-        
-        notes = []
-        
+
+        # Fully static notes are joined once at import (see constants above)
         if score == 0:
-            notes.append("Movimiento dentro de parámetros normales")
-            notes.append("No se observan signos de bradicinesia")
-            notes.append("Ritmo consistente y amplitud estable")
-        
-        elif score == 1:
-            notes.append("[LEVE] Signos tempranos de deterioro motor")
+            return _NOTES_SCORE_0
+        if score == 4:
+            return _NOTES_SCORE_4
+
+        notes = [_NOTE_HEADERS[score]]
+
+        if score == 1:
             if decay != 'normal':
                 notes.append(f"• Reducción leve de amplitud: {decay}")
             if ratio != 'normal':
                 notes.append(f"• Fatiga progresiva detectada: {ratio}")
             if rhythm != 'normal':
                 notes.append(f"• Ligera irregularidad del ritmo: {rhythm}")
-            notes.append("→ Recomendación: Monitoreo periódico")
-        
+
         elif score == 2:
-            notes.append("[MODERADO] Bradicinesia moderada detectada")
-            if decay in ['moderate', 'marked', 'severe']:
+            if decay in ('moderate', 'marked', 'severe'):
                 notes.append(f"• Reducción progresiva clara: {decay}")
-            if ratio in ['moderate', 'marked', 'severe']:
+            if ratio in ('moderate', 'marked', 'severe'):
                 notes.append(f"• Fatiga significativa en segunda mitad: {ratio}")
-            if magnitude in ['moderate', 'marked', 'severe']:
+            if magnitude in ('moderate', 'marked', 'severe'):
                 notes.append(f"• Amplitud reducida: {magnitude}")
-            notes.append("→ Recomendación: Evaluación neurológica completa")
-        
-        elif score == 3:
-            notes.append("[MARCADO] Bradicinesia marcada con compromiso funcional")
+
+        else:  # score == 3
             notes.append(f"• Reducción severa de amplitud: {decay}")
             notes.append(f"• Fatiga extrema: {ratio}")
-            if hesitation in ['marked', 'severe']:
+            if hesitation in ('marked', 'severe'):
                 notes.append(f"• Congelamiento frecuente: {hesitation}")
-            notes.append("→ Recomendación: Intervención terapéutica urgente")
-        
-        else:  # score == 4
-            notes.append("[SEVERO] Compromiso motor severo")
-            notes.append("• Capacidad de movimiento extremadamente limitada")
-            notes.append("• Bradykinesia extrema con posible congelamiento")
-            notes.append("→ Recomendación: Ajuste inmediato de tratamiento")
-        
+
+        notes.append(_NOTE_RECOMMENDATIONS[score])
         return "\n".join(notes)
@@ -1,3 +1,67 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy scan below still works
+    njit = None
+
+# Required accelerometer keys; one subset test per sample instead of a
+# three-iteration all(...) generator
+_XYZ = frozenset(("x", "y", "z"))
+
+
+def _active_start_scan(magnitudes, var_limit, min_len):
+    """Rolling sliding-window variance scan (JIT-compiled when numba is present).
+
+    The window sum and sum of squares are updated by adding the entering
+    sample and dropping the leaving one, so the whole scan is O(n) instead
+    of recomputing each window from scratch (O(n * min_len)).
+    """
+    n = magnitudes.shape[0]
+    inv_len = 1.0 / min_len
+    s = 0.0
+    ss = 0.0
+    for j in range(min_len):
+        v = magnitudes[j]
+        s += v
+        ss += v * v
+    for i in range(n - min_len):
+        mean = s * inv_len
+        if ss * inv_len - mean * mean > var_limit:
+            return i
+        v_in = magnitudes[i + min_len]
+        v_out = magnitudes[i]
+        s += v_in - v_out
+        ss += v_in * v_in - v_out * v_out
+    return 0
+
+
+if njit is not None:
+    # Explicit signature: compiles eagerly at import and lets the dispatcher
+    # load the cached binary directly instead of type-inferring on first call
+    _active_start_scan = njit("i8(f8[::1], f8, i8)", cache=True, fastmath=True,
+                              nogil=True)(_active_start_scan)
+
+
+def find_active_start(magnitudes, umbral=0.5, min_len=50):
+    """
+    Array counterpart of recortar_inactividad: locate the first active sample.
+
+    Parameters:
+        magnitudes (np.ndarray): acceleration magnitude per sample
+        umbral (float): minimum STANDARD DEVIATION of magnitude to consider as movement
+        min_len (int): sliding window length in samples
+
+    Returns:
+        int: index of the first window whose std exceeds the threshold (0 if none)
+    """
+    magnitudes = np.ascontiguousarray(magnitudes, dtype=np.float64)
+    if len(magnitudes) < min_len * 2:
+        return 0
+
+    return int(_active_start_scan(magnitudes, umbral * umbral, min_len))
+
+
 def recortar_inactividad(datos, umbral=0.5, min_len=50):
     """
     Trim the initial segment with no significant movement.
@@ -13,32 +77,18 @@ def recortar_inactividad(datos, umbral=0.5, min_len=50):
     """
     if len(datos) < min_len:
         return datos
-    
-    mags = []
-    for d in datos:
-        acc = d.get("accelerometer")
-        if acc and all(k in acc for k in ("x", "y", "z")):
-            mag = (acc["x"]**2 + acc["y"]**2 + acc["z"]**2) ** 0.5
-            mags.append(mag)
-        else:
-            mags.append(0)
-
-    if len(mags) < min_len * 2:
-        return datos
 
-    # Use a sliding window to find where variance increases (actual movement)
-    # Static gravity shows low variance, movement shows high variance
-    activo_idx = 0
-    window_size = min_len
-    
-    for i in range(len(mags) - window_size):
-        window = mags[i:i+window_size]
-        variance = sum((x - sum(window)/len(window))**2 for x in window) / len(window)
-        std_dev = variance ** 0.5
-        
-        # Movement detected when standard deviation exceeds threshold
-        if std_dev > umbral:
-            activo_idx = i
-            break
+    # Gather the acceleration components in one pass, then square/sum/sqrt
+    # as whole-array ops instead of per-sample Python arithmetic
+    acc_rows = np.array(
+        [(acc["x"], acc["y"], acc["z"])
+         if (acc := d.get("accelerometer")) and _XYZ <= acc.keys()
+         else (0.0, 0.0, 0.0)
+         for d in datos],
+        dtype=np.float64)
+    mags = np.sqrt(np.einsum("ij,ij->i", acc_rows, acc_rows))
 
+    # Static gravity shows low variance, movement shows high variance;
+    # the windowed variance scan itself lives in find_active_start
+    activo_idx = find_active_start(mags, umbral=umbral, min_len=min_len)
     return datos[activo_idx:]
@@ -2,7 +2,10 @@ import numpy as np
 from typing import Dict, List, Any
 from src.preprocessing.signal_processing import AccelerometerData, SignalProcessor
 from src.analysis.movement_analysis import MovementAnalyzer, MovementMetrics
-from src.preprocessing.cleaners import recortar_inactividad
+from src.preprocessing.cleaners import recortar_inactividad, find_active_start
+
+# Required accelerometer keys, tested with one subset comparison per sample
+_XYZ = frozenset(("x", "y", "z"))
 
 class MovementProcessor:
     def __init__(self):
@@ -35,63 +38,90 @@ class MovementProcessor:
                 # Store trimming info for debugging (could be exposed via return tuple if needed)
                 self._last_trim_info = {"original": original_length, "trimmed": trimmed_count, "remaining": len(data)}
         
-        # Convert raw data to numpy arrays
-        timestamps = np.array([d['timestamp'] for d in data])
-        acc_data = self._extract_accelerometer_data(data, timestamps)
-        
-        if len(timestamps) == 0:
-            return self._get_empty_metrics()
+        # Convert raw data to numpy arrays in one columnizing pass
+        acc_data = self._extract_accelerometer_data(data)
+
+        # Trimming already happened on the dict list above
+        return self.process_accelerometer_data(acc_data, n_reps=n_reps, trim_inactive=False)
+
+    def process_accelerometer_data(self, acc_data: AccelerometerData, n_reps: int = 10,
+                                   trim_inactive: bool = False, inactive_threshold: float = 0.5,
+                                   min_active_length: int = 50, return_peaks: bool = False):
+        """Process pre-extracted accelerometer arrays (no per-sample dicts involved).
+
+        Args:
+            acc_data: AccelerometerData with x/y/z/timestamps column arrays
+            n_reps: Expected number of repetitions to detect
+            trim_inactive: If True, drop the inactive initial period via find_active_start
+            inactive_threshold: Magnitude std threshold (m/s²) to consider movement active
+            min_active_length: Sliding window length for activity detection
+            return_peaks: If True, also return the detected peak indices so
+                callers (e.g. visualization) don't re-run peak detection
 
-        # Process signals
+        Returns:
+            MovementMetrics, or (MovementMetrics, peaks) when return_peaks is True
+        """
+        if len(acc_data.timestamps) == 0:
+            empty = self._get_empty_metrics()
+            return (empty, np.empty(0, dtype=np.intp)) if return_peaks else empty
+
+        # The cached magnitude is shared with trimming and later plotting;
+        # callers that already touched acc_data.magnitude pay nothing here
         magnitudes = acc_data.magnitude
 
+        if trim_inactive:
+            start = find_active_start(magnitudes, umbral=inactive_threshold,
+                                      min_len=min_active_length)
+            if start > 0:
+                acc_data = acc_data.sliced(start)
+                magnitudes = acc_data.magnitude
+
+        mag_min = float(magnitudes.min())
+        mag_max = float(magnitudes.max())
+
+        timestamps = acc_data.timestamps
+
         # Compute dynamic prominence threshold so small fluctuations are ignored
-        mag_min = magnitudes.min() if magnitudes.size else 0.0
-        mag_max = magnitudes.max() if magnitudes.size else 0.0
-        mag_range = mag_max - mag_min
         # prominence tuned to capture clear movement peaks; floor to small value
-        dynamic_prominence = max(0.2, 0.25 * mag_range)
+        dynamic_prominence = max(0.2, 0.25 * (mag_max - mag_min))
 
         peaks = self.signal_processor.detect_peaks(
             magnitudes,
             n_reps=n_reps,
             prominence=dynamic_prominence,
-            distance=10
+            distance=10,
+            wlen=256  # several movement cycles; keeps prominence search O(N*wlen)
         )
         
         if len(peaks) == 0:
-            return self._get_empty_metrics()
+            empty = self._get_empty_metrics()
+            return (empty, peaks) if return_peaks else empty
 
         intervals = self.signal_processor.calculate_intervals(timestamps, peaks)
 
         # Analyze movement patterns
-        return self.movement_analyzer.analyze_movement(
+        metrics = self.movement_analyzer.analyze_movement(
             magnitudes=magnitudes,
             peaks=peaks,
             intervals=intervals,
             z_accel=acc_data.z,
             timestamps=timestamps
         )
+        return (metrics, peaks) if return_peaks else metrics
 
-    def _extract_accelerometer_data(self, data: List[Dict[str, Any]], timestamps: np.ndarray) -> AccelerometerData:
-        x_values = []
-        y_values = []
-        z_values = []
-        valid_timestamps = []
-
-        for i, d in enumerate(data):
-            acc = d.get('accelerometer', {})
-            if all(k in acc for k in ('x', 'y', 'z')):
-                x_values.append(acc['x'])
-                y_values.append(acc['y'])
-                z_values.append(acc['z'])
-                valid_timestamps.append(timestamps[i])
+    def _extract_accelerometer_data(self, data: List[Dict[str, Any]]) -> AccelerometerData:
+        """Columnize the valid samples in one pass instead of four append loops"""
+        rows = np.array(
+            [(acc["x"], acc["y"], acc["z"], d["timestamp"])
+             for d in data
+             if (acc := d.get("accelerometer")) and _XYZ <= acc.keys()],
+            dtype=np.float64).reshape(-1, 4)
 
         return AccelerometerData(
-            x=np.array(x_values),
-            y=np.array(y_values),
-            z=np.array(z_values),
-            timestamps=np.array(valid_timestamps)
+            x=rows[:, 0].astype(np.float32),
+            y=rows[:, 1].astype(np.float32),
+            z=rows[:, 2].astype(np.float32),
+            timestamps=rows[:, 3].astype(np.int64)
         )
 
     def _get_empty_metrics(self) -> MovementMetrics:
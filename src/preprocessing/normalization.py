@@ -0,0 +1,109 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from src.preprocessing.signal_processing import AccelerometerData
+
+# Input accelerometer values in the raw (izquierda/derecha) format come in
+# gravitational units (g); convert to m/s². Gyroscope is already in °/s.
+G_TO_MS2 = 9.81
+
+# One structured row per IMU sample so a whole file can be parsed in a single
+# pass with np.fromiter instead of building one dict per sample. Sensor values
+# carry ~10 bits of real precision, so float32 is plenty and halves the memory
+# traffic of the downstream (memory-bound) signal pipeline.
+_IMU_DTYPE = np.dtype([
+    ("side", "i1"),  # 0 = LEFT, 1 = RIGHT
+    ("t", "i8"),
+    ("ax", "f4"), ("ay", "f4"), ("az", "f4"),
+    ("gx", "f4"), ("gy", "f4"), ("gz", "f4"),
+])
+
+@dataclass
+class SideArrays:
+    """SoA container for one side's sensor stream (sorted by timestamp).
+
+    Holds the columns once instead of a list of per-sample dicts, so
+    downstream consumers slice/index arrays rather than re-walking dicts.
+    """
+    timestamps: np.ndarray  # (N,) int64, ms
+    acc: np.ndarray         # (N, 3) m/s²
+    gyro: np.ndarray        # (N, 3) °/s
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def sliced(self, start: int) -> "SideArrays":
+        """Return a zero-copy view dropping the first `start` samples."""
+        return SideArrays(self.timestamps[start:], self.acc[start:], self.gyro[start:])
+
+    def accelerometer_data(self) -> AccelerometerData:
+        """View the accelerometer columns as an AccelerometerData (no copies)."""
+        return AccelerometerData(x=self.acc[:, 0], y=self.acc[:, 1],
+                                 z=self.acc[:, 2], timestamps=self.timestamps)
+
+
+def _rows_from_imudata(samples: List[Dict[str, Any]]):
+    """Yield structured rows from the legacy imuData format (one pass)."""
+    for d in samples:
+        acc = d.get("accelerometer")
+        if not acc or not all(k in acc for k in ("x", "y", "z")):
+            continue
+        gyro = d.get("gyroscope") or {}
+        yield (
+            0 if "LEFT" in d["deviceId"].upper() else 1,
+            d["timestamp"],
+            acc["x"], acc["y"], acc["z"],
+            gyro.get("x", 0.0), gyro.get("y", 0.0), gyro.get("z", 0.0),
+        )
+
+
+def _rows_from_raw(samples: List[Dict[str, Any]], side_code: int):
+    """Yield structured rows from the raw izquierda/derecha format (one pass)."""
+    for d in samples:
+        yield (
+            side_code,
+            d["millis"],
+            d["x"], d["y"], d["z"],
+            d["a"], d["b"], d["g"],
+        )
+
+
+def _columns_from_rows(rows: np.ndarray, acc_scale: float = 1.0) -> SideArrays:
+    """Sort structured rows by timestamp and split into column arrays."""
+    order = np.argsort(rows["t"], kind="stable")
+    rows = rows[order]
+    timestamps = np.ascontiguousarray(rows["t"])
+    acc = np.column_stack((rows["ax"], rows["ay"], rows["az"]))
+    if acc_scale != 1.0:
+        acc *= np.float32(acc_scale)
+    gyro = np.column_stack((rows["gx"], rows["gy"], rows["gz"]))
+    return SideArrays(timestamps=timestamps, acc=acc, gyro=gyro)
+
+
+def normalize_json_data(data: Dict[str, Any]) -> Dict[str, SideArrays]:
+    """Normalize either supported JSON shape into per-side SideArrays.
+
+    Returns a dict {"LEFT": SideArrays, "RIGHT": SideArrays} with timestamps
+    in int64 ms and acc/gyro as (N, 3) float32 arrays in m/s² and °/s
+    respectively, sorted by timestamp.
+    """
+    empty = np.empty(0, dtype=_IMU_DTYPE)
+    sides: Dict[str, SideArrays] = {}
+
+    if isinstance(data, dict) and "imuData" in data:
+        rows = np.fromiter(_rows_from_imudata(data["imuData"]), dtype=_IMU_DTYPE)
+        for name, code in (("LEFT", 0), ("RIGHT", 1)):
+            sides[name] = _columns_from_rows(rows[rows["side"] == code])
+    elif isinstance(data, dict) and ("izquierda" in data or "derecha" in data):
+        for name, raw_key, code in (("LEFT", "izquierda", 0), ("RIGHT", "derecha", 1)):
+            if raw_key in data:
+                rows = np.fromiter(_rows_from_raw(data[raw_key], code), dtype=_IMU_DTYPE)
+            else:
+                rows = empty
+            sides[name] = _columns_from_rows(rows, acc_scale=G_TO_MS2)
+    else:
+        sides["LEFT"] = _columns_from_rows(empty)
+        sides["RIGHT"] = _columns_from_rows(empty)
+
+    return sides
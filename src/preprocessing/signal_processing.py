@@ -1,8 +1,28 @@
 import numpy as np
 from scipy.signal import find_peaks
 from dataclasses import dataclass
+from functools import cached_property
 from typing import List, Tuple, Optional
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy fallback below is used
+    njit = None
+
+
+def _magnitude_jit(x, y, z):
+    """Fused |a| kernel: one output stream, no x**2/y**2/z**2 temporaries."""
+    n = x.shape[0]
+    out = np.empty(n, dtype=x.dtype)
+    for i in range(n):
+        out[i] = np.sqrt(x[i] * x[i] + y[i] * y[i] + z[i] * z[i])
+    return out
+
+
+if njit is not None:
+    _magnitude_jit = njit(cache=True, fastmath=True, nogil=True)(_magnitude_jit)
+
+
 @dataclass
 class AccelerometerData:
     x: np.ndarray
@@ -10,9 +30,27 @@ class AccelerometerData:
     z: np.ndarray
     timestamps: np.ndarray
 
-    @property
+    @cached_property
     def magnitude(self) -> np.ndarray:
-        return np.sqrt(self.x**2 + self.y**2 + self.z**2)
+        # Computed once per instance; the app reads this 4-6 times per side
+        # (prominence, peak detection, several plots)
+        if njit is not None:
+            return _magnitude_jit(self.x, self.y, self.z)
+        return np.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def sliced(self, start: int) -> "AccelerometerData":
+        """Samples from `start` on, carrying any computed magnitude forward.
+
+        The column slices are NumPy views, and a magnitude already cached
+        on this instance is sliced along with them so trimming does not
+        force downstream consumers to recompute it.
+        """
+        out = AccelerometerData(x=self.x[start:], y=self.y[start:],
+                                z=self.z[start:],
+                                timestamps=self.timestamps[start:])
+        if 'magnitude' in self.__dict__:
+            out.__dict__['magnitude'] = self.magnitude[start:]
+        return out
 
 class SignalProcessor:
     def __init__(self, height_threshold: float = 0.2, min_distance: int = 10):
@@ -25,7 +63,8 @@ class SignalProcessor:
                      height: Optional[float] = None,
                      distance: Optional[int] = None,
                      prominence: Optional[float] = None,
-                     width: Optional[float] = None) -> np.ndarray:
+                     width: Optional[float] = None,
+                     wlen: Optional[int] = None) -> np.ndarray:
         """Enhanced peak detection with optional prominence and peak-count limiting.
 
         Args:
@@ -35,6 +74,8 @@ class SignalProcessor:
             distance: Minimal distance between peaks (overrides instance value)
             prominence: Minimal prominence for peaks (preferred for ignoring small bumps)
             width: Minimal width for peaks
+            wlen: Window length bounding the prominence search; without it
+                scipy scans to the trace edges for every candidate peak
 
         Returns:
             numpy array with indices of detected peaks
@@ -48,21 +89,23 @@ class SignalProcessor:
                                   height=height,
                                   distance=distance,
                                   prominence=prominence,
-                                  width=width)
+                                  width=width,
+                                  wlen=wlen)
 
         if n_reps and len(peaks) > n_reps:
             # Prefer peaks with larger prominence first, then height
             prominences = props.get('prominences')
             heights = props.get('peak_heights')
-            # Build sorting key: (prominence, height)
             if prominences is not None:
-                order = np.argsort(prominences)
+                key = prominences
             elif heights is not None:
-                order = np.argsort(heights)
+                key = heights
             else:
-                order = np.argsort(signal[peaks])
+                key = signal[peaks]
 
-            top_idx = order[-n_reps:]
+            # O(k) selection of the n largest; a full argsort is not needed
+            # since the kept peaks get re-sorted by position anyway
+            top_idx = np.argpartition(key, len(peaks) - n_reps)[-n_reps:]
             peaks = peaks[top_idx]
             peaks.sort()
 
@@ -70,13 +113,13 @@ class SignalProcessor:
 
     def calculate_intervals(self, timestamps: np.ndarray, peaks: np.ndarray) -> np.ndarray:
         """Calculate time intervals between consecutive peaks"""
-        return np.diff(timestamps[peaks])
+        # Direct subtraction of the gathered values; skips np.diff's
+        # general-axis machinery for this 1-D case
+        peak_times = timestamps[peaks]
+        return peak_times[1:] - peak_times[:-1]
 
     def calculate_vertical_range(self, acc_data: AccelerometerData) -> float:
         """Calculate maximum range across all axes"""
-        ranges = [
-            np.ptp(acc_data.x),
-            np.ptp(acc_data.y),
-            np.ptp(acc_data.z)
-        ]
-        return max(ranges)
\ No newline at end of file
+        return float(max(np.ptp(acc_data.x),
+                         np.ptp(acc_data.y),
+                         np.ptp(acc_data.z)))
\ No newline at end of file
@@ -1,15 +1,63 @@
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import pandas as pd
 
-from typing import List, Optional
+# Drop near-collinear vertices while rendering and chunk long Agg paths;
+# both cut draw CPU for dense sensor traces without visible difference
+matplotlib.rcParams['path.simplify'] = True
+matplotlib.rcParams['path.simplify_threshold'] = 1.0
+matplotlib.rcParams['agg.path.chunksize'] = 10000
+
+from typing import List, Optional, Tuple
 from src.preprocessing.signal_processing import AccelerometerData
 
+# Traces shorter than this are plotted as-is; longer ones get decimated
+_DOWNSAMPLE_THRESHOLD = 4000
+
+
+def decimated(t: np.ndarray, y: np.ndarray, n_out: int = 2000) -> Tuple[np.ndarray, np.ndarray]:
+    """Min/max-per-bucket decimation of a line trace for plotting.
+
+    Keeping each bucket's extremes preserves the visual envelope of the
+    signal (the same idea as LTTB downsampling) while capping what gets
+    handed to matplotlib, whose draw time grows with every vertex. Short
+    traces are returned untouched.
+    """
+    n = len(y)
+    if n <= max(_DOWNSAMPLE_THRESHOLD, 2 * n_out):
+        return t, y
+
+    n_buckets = n_out // 2
+    width = n // n_buckets
+    usable = n_buckets * width
+    buckets = y[:usable].reshape(n_buckets, width)
+    offsets = np.arange(n_buckets) * width
+    idx = np.concatenate([buckets.argmin(axis=1) + offsets,
+                          buckets.argmax(axis=1) + offsets,
+                          np.arange(usable, n)])
+    idx.sort()
+    return t[idx], y[idx]
+
+
 class MovementVisualizer:
     def __init__(self):
         sns.set_style("whitegrid")
         plt.rcParams['figure.figsize'] = [12, 8]
+        # Lazily-built 2x2 figure reused across plot_movement_comparison
+        # calls; clearing axes is far cheaper than rebuilding the figure
+        self._comparison_fig = None
+        self._comparison_axes = None
+
+    def _get_comparison_canvas(self):
+        """Return the shared 2x2 figure, clearing it for the next file"""
+        if self._comparison_fig is None:
+            self._comparison_fig, self._comparison_axes = plt.subplots(2, 2, figsize=(15, 10))
+        else:
+            for ax in self._comparison_axes.ravel():
+                ax.clear()
+        return self._comparison_fig, self._comparison_axes
 
     def plot_movement_data(self, 
                          acc_data: AccelerometerData, 
@@ -23,7 +71,7 @@ class MovementVisualizer:
         magnitude = acc_data.magnitude
         time_seconds = (acc_data.timestamps - acc_data.timestamps[0]) / 1000  # Convert to seconds
         
-        ax1.plot(time_seconds, magnitude, label='Magnitude')
+        ax1.plot(*decimated(time_seconds, magnitude), label='Magnitude')
         if len(peaks) > 0:
             ax1.plot(time_seconds[peaks], magnitude[peaks], 'ro', label='Peaks')
         
@@ -33,9 +81,9 @@ class MovementVisualizer:
         ax1.legend()
         
         # Plot individual axes
-        ax2.plot(time_seconds, acc_data.x, 'r-', label='X', alpha=0.7)
-        ax2.plot(time_seconds, acc_data.y, 'g-', label='Y', alpha=0.7)
-        ax2.plot(time_seconds, acc_data.z, 'b-', label='Z', alpha=0.7)
+        ax2.plot(*decimated(time_seconds, acc_data.x), 'r-', label='X', alpha=0.7)
+        ax2.plot(*decimated(time_seconds, acc_data.y), 'g-', label='Y', alpha=0.7)
+        ax2.plot(*decimated(time_seconds, acc_data.z), 'b-', label='Z', alpha=0.7)
         ax2.set_xlabel('Time (s)')
         ax2.set_ylabel('Acceleration (m/s²)')
         ax2.legend()
@@ -56,13 +104,13 @@ class MovementVisualizer:
                                title: str,
                                save_path: Optional[str] = None):
         """Plot left and right movement data side by side"""
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+        fig, ((ax1, ax2), (ax3, ax4)) = self._get_comparison_canvas()
         
         # Left side plots
         time_left = (left_data.timestamps - left_data.timestamps[0]) / 1000
         mag_left = left_data.magnitude
         
-        ax1.plot(time_left, mag_left, 'b-', label='Magnitude')
+        ax1.plot(*decimated(time_left, mag_left), 'b-', label='Magnitude')
         if len(left_peaks) > 0:
             ax1.plot(time_left[left_peaks], mag_left[left_peaks], 'ro', label='Peaks')
         ax1.set_title('Left Side')
@@ -70,9 +118,9 @@ class MovementVisualizer:
         ax1.set_ylabel('Magnitude (m/s²)')
         ax1.legend()
         
-        ax3.plot(time_left, left_data.x, 'r-', label='X', alpha=0.7)
-        ax3.plot(time_left, left_data.y, 'g-', label='Y', alpha=0.7)
-        ax3.plot(time_left, left_data.z, 'b-', label='Z', alpha=0.7)
+        ax3.plot(*decimated(time_left, left_data.x), 'r-', label='X', alpha=0.7)
+        ax3.plot(*decimated(time_left, left_data.y), 'g-', label='Y', alpha=0.7)
+        ax3.plot(*decimated(time_left, left_data.z), 'b-', label='Z', alpha=0.7)
         ax3.set_xlabel('Time (s)')
         ax3.set_ylabel('Acceleration (m/s²)')
         ax3.legend()
@@ -81,7 +129,7 @@ class MovementVisualizer:
         time_right = (right_data.timestamps - right_data.timestamps[0]) / 1000
         mag_right = right_data.magnitude
         
-        ax2.plot(time_right, mag_right, 'b-', label='Magnitude')
+        ax2.plot(*decimated(time_right, mag_right), 'b-', label='Magnitude')
         if len(right_peaks) > 0:
             ax2.plot(time_right[right_peaks], mag_right[right_peaks], 'ro', label='Peaks')
         ax2.set_title('Right Side')
@@ -89,23 +137,23 @@ class MovementVisualizer:
         ax2.set_ylabel('Magnitude (m/s²)')
         ax2.legend()
         
-        ax4.plot(time_right, right_data.x, 'r-', label='X', alpha=0.7)
-        ax4.plot(time_right, right_data.y, 'g-', label='Y', alpha=0.7)
-        ax4.plot(time_right, right_data.z, 'b-', label='Z', alpha=0.7)
+        ax4.plot(*decimated(time_right, right_data.x), 'r-', label='X', alpha=0.7)
+        ax4.plot(*decimated(time_right, right_data.y), 'g-', label='Y', alpha=0.7)
+        ax4.plot(*decimated(time_right, right_data.z), 'b-', label='Z', alpha=0.7)
         ax4.set_xlabel('Time (s)')
         ax4.set_ylabel('Acceleration (m/s²)')
         ax4.legend()
-        
-        plt.suptitle(title)
-        plt.tight_layout()
-        
+
+        fig.suptitle(title)
+        fig.tight_layout()
+
         if save_path:
-            plt.savefig(save_path)
-            plt.close()
+            # Keep the figure alive for the next call instead of closing it
+            fig.savefig(save_path)
         else:
             plt.show()
 
-    def plot_metrics_comparison(self, 
+    def plot_metrics_comparison(self,
                               metrics_list: List[dict], 
                               groups: List[str],
                               save_path: Optional[str] = None):